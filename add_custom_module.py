@@ -13,32 +13,49 @@ Example:
     python3 add_custom_module.py /path/to/my_project DataProcessor
 """
 
+import re
 import sys
+import functools
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
 
+# Matches the `project(<name> ...)` command; CMake commands are case-insensitive
+_PROJECT_RE = re.compile(r'^\s*project\(\s*(\w+)', re.MULTILINE | re.IGNORECASE)
 
-def render_template(template_name, context, template_dir):
-    """Render a Jinja2 template."""
-    env = Environment(loader=FileSystemLoader(template_dir))
-    template = env.get_template(template_name)
-    return template.render(context)
+_SEP = "=" * 70
+
+
+def _bytecode_cache():
+    """Return an on-disk cache for compiled templates, or None if unavailable."""
+    from jinja2 import FileSystemBytecodeCache
+    try:
+        return FileSystemBytecodeCache(pattern="hulotte_%s.cache")
+    except (OSError, RuntimeError):
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def _get_env(template_dir):
+    """Return the Jinja2 environment for template_dir (built once per process)."""
+    # Imported here so the usage/error paths don't pay for loading Jinja2
+    from jinja2 import Environment, FileSystemLoader
+    return Environment(
+        loader=FileSystemLoader(template_dir),
+        auto_reload=False,
+        cache_size=-1,
+        bytecode_cache=_bytecode_cache(),
+    )
 
 
 def get_project_name(project_dir):
     """Extract project name from CMakeLists.txt."""
     cmake_path = Path(project_dir) / "CMakeLists.txt"
-    if not cmake_path.exists():
+    try:
+        text = cmake_path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
         return None
     
-    with open(cmake_path, 'r') as f:
-        for line in f:
-            if line.startswith('project('):
-                import re
-                match = re.search(r'project\((\w+)', line)
-                if match:
-                    return match.group(1)
-    return None
+    match = _PROJECT_RE.search(text)
+    return match.group(1) if match else None
 
 
 def create_custom_module(project_dir, module_name, template_dir):
@@ -49,19 +66,18 @@ def create_custom_module(project_dir, module_name, template_dir):
     # Generate from templates
     context = {"module_name": module_name}
     
-    header_content = render_template("MyModule.hpp.j2", context, template_dir)
-    impl_content = render_template("MyModule.cpp.j2", context, template_dir)
+    env = _get_env(template_dir)
+    header_content = env.get_template("MyModule.hpp.j2").render(context)
+    impl_content = env.get_template("MyModule.cpp.j2").render(context)
     
     header_path = custom_dir / f"{module_name}.hpp"
     impl_path = custom_dir / f"{module_name}.cpp"
     
     # Create files
-    with open(header_path, 'w') as f:
-        f.write(header_content)
+    header_path.write_bytes(header_content.encode("utf-8"))
     print(f"✓ Created {header_path.relative_to(project_dir)}")
     
-    with open(impl_path, 'w') as f:
-        f.write(impl_content)
+    impl_path.write_bytes(impl_content.encode("utf-8"))
     print(f"✓ Created {impl_path.relative_to(project_dir)}")
     
     return header_path, impl_path
@@ -98,9 +114,9 @@ def main():
         print(f"ERROR: Templates directory not found: {template_dir}")
         sys.exit(1)
     
-    print(f"\n{'='*70}")
+    print("\n" + _SEP)
     print(f"ADDING CUSTOM MODULE TO PROJECT")
-    print(f"{'='*70}\n")
+    print(_SEP + "\n")
     
     print(f"Project: {project_name}")
     print(f"Location: {project_dir}")
@@ -109,32 +125,32 @@ def main():
     # Generate module files
     header_path, impl_path = create_custom_module(project_dir, module_name, template_dir)
     
-    print(f"\n{'='*70}")
-    print("MODULE FILES CREATED SUCCESSFULLY!")
-    print(f"{'='*70}\n")
-    
-    print("✨ FILES CREATED:")
-    print(f"   • src/custom/{module_name}.hpp")
-    print(f"   • src/custom/{module_name}.cpp\n")
-    
-    print("📝 NEXT STEPS:\n")
-    
-    print("CMakeLists.txt: ✓ NO CHANGES NEEDED")
-    print("(Automatically compiles all .cpp files in src/custom/)\n")
-    
-    print("1. UPDATE main.cpp (only step):")
-    print(f"   //Add include at top:")
-    print(f'       #include "custom/{module_name}.hpp"\n')
-    print("   //Add instantiation in '// 1. Modules creation':")
-    print(f'       module::{module_name} {module_name.lower()}(n_elmts);\n')
-    print("   //Add socket binding in '// 2. Sockets binding':")
-    print(f'       my_module ["process::out"] = {module_name.lower()} ["process::in"];')
-    print(f"       {module_name.lower()} [\"process::out\"] = finalizer [\"finalize::in\"];\n")
-    
-    print("2. REBUILD:")
-    print(f"   cd {project_dir}/build")
-    print("   cmake ..  (to discover new modules)")
-    print("   make\n")
+    module_var = module_name.lower()
+    banner = "\n".join([
+        "",
+        _SEP,
+        "MODULE FILES CREATED SUCCESSFULLY!",
+        _SEP + "\n",
+        "✨ FILES CREATED:",
+        f"   • src/custom/{module_name}.hpp",
+        f"   • src/custom/{module_name}.cpp\n",
+        "📝 NEXT STEPS:\n",
+        "CMakeLists.txt: ✓ NO CHANGES NEEDED",
+        "(Automatically compiles all .cpp files in src/custom/)\n",
+        "1. UPDATE main.cpp (only step):",
+        "   //Add include at top:",
+        f'       #include "custom/{module_name}.hpp"\n',
+        "   //Add instantiation in '// 1. Modules creation':",
+        f'       module::{module_name} {module_var}(n_elmts);\n',
+        "   //Add socket binding in '// 2. Sockets binding':",
+        f'       my_module ["process::out"] = {module_var} ["process::in"];',
+        f'       {module_var} ["process::out"] = finalizer ["finalize::in"];\n',
+        "2. REBUILD:",
+        f"   cd {project_dir}/build",
+        "   cmake ..  (to discover new modules)",
+        "   make\n",
+    ])
+    sys.stdout.write(banner + "\n")
 
 
 if __name__ == "__main__":
@@ -14,10 +14,16 @@ Example:
     python3 add_hardware_module.py /path/to/my_project FilterBlock
 """
 
+import re
 import sys
 from pathlib import Path
 from jinja2 import Environment, FileSystemLoader
 
+# Matches the `project(<name> ...)` command; CMake commands are case-insensitive
+_PROJECT_RE = re.compile(r'^\s*project\(\s*(\w+)', re.MULTILINE | re.IGNORECASE)
+
+_SEP = "=" * 70
+
 
 def render_template(template_name, context, template_dir):
     """Render a Jinja2 template."""
@@ -29,17 +35,13 @@ def render_template(template_name, context, template_dir):
 def get_project_name(project_dir):
     """Extract project name from CMakeLists.txt."""
     cmake_path = Path(project_dir) / "CMakeLists.txt"
-    if not cmake_path.exists():
+    try:
+        text = cmake_path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
         return None
     
-    with open(cmake_path, 'r') as f:
-        for line in f:
-            if line.startswith('project('):
-                import re
-                match = re.search(r'project\((\w+)', line)
-                if match:
-                    return match.group(1)
-    return None
+    match = _PROJECT_RE.search(text)
+    return match.group(1) if match else None
 
 
 def create_hardware_module(project_dir, module_name, template_dir):
@@ -160,9 +162,9 @@ def main():
         print(f"ERROR: Templates directory not found: {template_dir}")
         sys.exit(1)
     
-    print(f"\n{'='*70}")
+    print("\n" + _SEP)
     print(f"ADDING HARDWARE BLOCK TO PROJECT")
-    print(f"{'='*70}\n")
+    print(_SEP + "\n")
     
     print(f"Project: {project_name}")
     print(f"Location: {project_dir}")
@@ -171,9 +173,9 @@ def main():
     # Generate hardware module file
     sv_path = create_hardware_module(project_dir, module_name, template_dir)
     
-    print(f"\n{'='*70}")
+    print("\n" + _SEP)
     print("HARDWARE BLOCK CREATED SUCCESSFULLY!")
-    print(f"{'='*70}\n")
+    print(_SEP + "\n")
     
     print("✨ FILES CREATED/UPDATED:")
     print(f"   • src/hw/{module_name}.sv (hardware implementation)")
@@ -5,25 +5,97 @@ Supports StreamPU, optional AFF3CT, and optional custom modules.
 """
 
 import os
+import re
 import sys
 import argparse
-import math
-import wave
-import struct
-import shutil
-import tempfile
-import subprocess
+import functools
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
-from hulotte_utils import to_relative_path, print_ascii_art, play_owl_hoot
+from hulotte_utils import to_relative_path, print_ascii_art, play_owl_hoot_in_background
+
+_TEMPLATE_DIR = Path(__file__).resolve().parent / "templates"
+
+_SEP = "=" * 60
+
+# Project names: ASCII letters, digits, hyphens and underscores
+_NAME_RE = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def _bytecode_cache():
+    """Return an on-disk cache for compiled templates, or None if unavailable."""
+    from jinja2 import FileSystemBytecodeCache
+    try:
+        return FileSystemBytecodeCache(pattern="hulotte_%s.cache")
+    except (OSError, RuntimeError):
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def _get_env():
+    """Return the Jinja2 environment for the templates directory (built once per process)."""
+    # Imported here so --help and early aborts don't pay for loading Jinja2
+    from jinja2 import Environment, FileSystemLoader
+    return Environment(
+        loader=FileSystemLoader(_TEMPLATE_DIR),
+        auto_reload=False,
+        cache_size=-1,
+        bytecode_cache=_bytecode_cache(),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _get_template(template_name):
+    """Return the compiled template for template_name (looked up once per process)."""
+    return _get_env().get_template(template_name)
+
+
+# Every template create_project may render (the static HW files are copied, not rendered)
+_TEMPLATE_NAMES = (
+    "CMakeLists.txt.j2",
+    "main.cpp.j2",
+    "MyModule.hpp.j2",
+    "MyModule.cpp.j2",
+    "gitignore.j2",
+    "build.sh.j2",
+    "README.md.j2",
+    "view_waves.sh.j2",
+)
+
+
+def _warm_templates():
+    """Load and compile every template ahead of use (best-effort)."""
+    try:
+        for template_name in _TEMPLATE_NAMES:
+            _get_template(template_name)
+    except Exception:
+        # Any real problem is reported when the template is rendered
+        pass
 
 
 def render_template(template_name, context):
     """Render a Jinja2 template."""
-    template_dir = Path(__file__).resolve().parent / "templates"
-    env = Environment(loader=FileSystemLoader(template_dir))
-    template = env.get_template(template_name)
-    return template.render(context)
+    return _get_template(template_name).render(context)
+
+
+def render_template_to(template_name, context, path):
+    """Render a Jinja2 template straight into path (UTF-8), chunk by chunk."""
+    _get_template(template_name).stream(context).dump(os.fspath(path), encoding="utf-8")
+
+
+def _resolve_once(path):
+    """Return path made absolute, only walking it with realpath() when that can change it."""
+    # An absolute, normalized path that is not itself a symlink is used as given (symlinked
+    # parents still name the same directory), sparing realpath()'s per-component lstat() calls
+    if os.path.isabs(path) and os.path.normpath(path) == path and not os.path.islink(path):
+        return path
+    return os.path.realpath(path)
+
+
+@functools.lru_cache(maxsize=1)
+def _verilator_prefix():
+    """Return the Verilator install prefix (probed once per process)."""
+    if os.path.exists("/usr/share/verilator/verilator-config.cmake"):
+        return "/usr/share/verilator"
+    return "/usr/local/share/verilator"
 
 
 def ask_yes_no(question, default=False):
@@ -51,21 +123,21 @@ def ask_path(question, default=None, must_exist=True):
         else:
             response = input(f"{question}: ").strip()
         
-        path = Path(response).expanduser()
-        if not must_exist or path.exists():
-            return str(path.resolve())
+        path = os.path.realpath(os.path.expanduser(response))
+        if not must_exist or os.path.exists(path):
+            return path
         else:
             print(f"Path does not exist: {response}")
             if ask_yes_no("Try anyway?", default=False):
-                return str(path.resolve())
+                return path
 
 
 def ask_streampu_root(default=None):
     """Ask for StreamPU root and validate libstreampu.a presence."""
     while True:
         root = ask_path("Path to StreamPU directory", default, must_exist=True)
-        lib_path = Path(root) / "build" / "lib" / "libstreampu.a"
-        if lib_path.exists():
+        lib_path = os.path.join(root, "build", "lib", "libstreampu.a")
+        if os.path.exists(lib_path):
             return root
         print(f"libstreampu.a not found at {lib_path}")
         if not ask_yes_no("Try another StreamPU path?", default=True):
@@ -76,8 +148,8 @@ def ask_aff3ct_root(default=None):
     """Ask for AFF3CT root and validate header presence."""
     while True:
         root = ask_path("Path to AFF3CT directory", default, must_exist=True)
-        header_path = Path(root) / "include" / "aff3ct.hpp"
-        if header_path.exists():
+        header_path = os.path.join(root, "include", "aff3ct.hpp")
+        if os.path.exists(header_path):
             return root
         print(f"aff3ct.hpp not found at {header_path}")
         if not ask_yes_no("Try another AFF3CT path?", default=True):
@@ -94,55 +166,94 @@ def ask_name(question, default=None):
         else:
             response = input(f"{question}: ").strip()
         
-        if response and response.replace("_", "").replace("-", "").isalnum():
+        if response and _NAME_RE.fullmatch(response):
             return response
         else:
             print("Invalid name. Use alphanumeric characters, hyphens, or underscores.")
 
 
+def _write_executable(path, content):
+    """Write a script and mark it executable (0755)."""
+    # os.fdopen's write loops until everything is written (a single os.write may not)
+    with os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o755), "wb") as f:
+        f.write(content.encode("utf-8"))
+    # The mode given to os.open is masked by the umask and ignored for pre-existing files;
+    # os.chmod (unlike os.fchmod) is also available on Windows
+    os.chmod(path, 0o755)
+
+
+def _emit(path, template_name, context, executable=False):
+    """Render template_name with context and write it to path (copied verbatim if context is None)."""
+    if context is None:
+        import shutil
+        # copyfile() moves the data in-kernel (sendfile/fcopyfile) and leaves the mode to the umask
+        shutil.copyfile(_TEMPLATE_DIR / template_name, path)
+    elif executable:
+        _write_executable(path, render_template(template_name, context))
+    else:
+        render_template_to(template_name, context, path)
+
+
+def _fast_copy(src, dst):
+    """Copy src to dst with its mode bits, letting the kernel clone the data when it can."""
+    import shutil
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                # copy_file_range() reflinks on CoW filesystems (Btrfs, XFS) and
+                # copies in-kernel elsewhere
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        raise OSError("copy_file_range made no progress")
+                    remaining -= copied
+            shutil.copymode(src, dst)
+            return dst
+        except OSError:
+            pass
+    return shutil.copy(src, dst)
+
+
 def copy_common_files(project_dir, hulotte_dir):
     """Copy Common HW/SW files to project."""
+    import shutil
     src_common = Path(hulotte_dir) / "Common" / "streampu"
     dst_common = Path(project_dir) / "common"
     
     if src_common.exists():
-        shutil.copytree(src_common, dst_common, dirs_exist_ok=True)
-        print(f"✓ Copied common files to common/")
+        # _fast_copy keeps the mode bits but skips copystat() on every file
+        shutil.copytree(src_common, dst_common, copy_function=_fast_copy, dirs_exist_ok=True)
         return True
     else:
         print(f"WARNING: Common directory not found at {src_common}")
         return False
 
 
-def create_project(hoot=False, project_name=None, use_streampu=None, use_aff3ct=None, use_custom=None, use_hw=None, streampu_root=None, aff3ct_root=None):
+def create_project(hoot=False, project_name=None, use_streampu=None, use_aff3ct=None, use_custom=None, use_hw=None, streampu_root=None, aff3ct_root=None, quiet=False):
     """Main project generation function."""
     print_ascii_art()
     if hoot:
-        play_owl_hoot()
-    print("\n" + "="*60)
+        play_owl_hoot_in_background()
+    print("\n" + _SEP)
     print("HULOTTE PROJECT GENERATOR")
-    print("="*60 + "\n")
+    print(_SEP + "\n")
     
+    # Projects are always created in the current directory
+    output_dir = "."
+
     # Gather user input
     if project_name is None:
         project_name = ask_name("Project name:", "my_spu_project")
-        
-    output_dir = "." # Default to current directory when running with args, could be improved
-    # To support interactive output dir when name is not provided:
-    # If project_name is missing, we are in interactive mode -> we pass None to trigger questions.
-    
-    if project_name is None:
-        output_dir = ask_path("Output directory:", ".", must_exist=True)
-    else:
-        output_dir = "."
 
-    hulotte_dir = str(Path.cwd().resolve())
+    # getcwd() already returns the physical path, no need to resolve() it
+    hulotte_dir = os.getcwd()
     
     # StreamPU is mandatory
     use_streampu = True
 
     if streampu_root:
-        streampu_dir = str(Path(streampu_root).resolve())
+        streampu_dir = _resolve_once(streampu_root)
     else:
         streampu_dir = ask_streampu_root(None)
     
@@ -151,7 +262,7 @@ def create_project(hoot=False, project_name=None, use_streampu=None, use_aff3ct=
     
     if use_aff3ct:
         if aff3ct_root:
-            aff3ct_dir = str(Path(aff3ct_root).resolve())
+            aff3ct_dir = _resolve_once(aff3ct_root)
         else:
             aff3ct_dir = ask_aff3ct_root(None)
     else:
@@ -163,43 +274,56 @@ def create_project(hoot=False, project_name=None, use_streampu=None, use_aff3ct=
     if use_hw is None:
         use_hw = ask_yes_no("Add hardware simulation (Verilator)?", default=False)
     
-    # Create project directory
+    return _generate_project(project_name, output_dir, hulotte_dir, streampu_dir, aff3ct_dir,
+                             use_streampu, use_aff3ct, use_custom, use_hw, quiet)
+
+
+def _generate_project(project_name, output_dir, hulotte_dir, streampu_dir, aff3ct_dir,
+                      use_streampu, use_aff3ct, use_custom, use_hw, quiet=False):
+    """Generate the project files once every option is known (never prompts)."""
+    # Create the project directory tree up front
     project_dir = Path(output_dir) / project_name
+    src_dir = project_dir / "src"
+    hw_dir = src_dir / "hw"
+    common_hw_dir = project_dir / "common" / "hw"
+    custom_dir = src_dir / "custom"
+    directories = [src_dir]
+    if use_hw:
+        directories += [hw_dir, common_hw_dir]
+    if use_custom:
+        directories.append(custom_dir)
     try:
-        project_dir.mkdir(parents=True, exist_ok=True)
+        for directory in directories:
+            directory.mkdir(parents=True, exist_ok=True)
     except Exception as e:
         print(f"ERROR: Cannot create project directory: {e}")
         return False
     
     print(f"\nCreating project in: {to_relative_path(project_dir)}\n")
     
-    # Create source directory
-    src_dir = project_dir / "src"
-    src_dir.mkdir(exist_ok=True)
+    # Progress lines, flushed in one write once every file is generated
+    created = []
+    
+    # Copy the Common HW/SW sources first: the simulation wrappers generated
+    # below replace the copies shipped in Common/
+    if use_hw and copy_common_files(project_dir, hulotte_dir):
+        created.append("✓ Copied common files to common/")
+    
+    # Files to generate, in order: (path, template, context, executable, progress line)
+    emissions = []
     
     # HW Support
     if use_hw:
-        hw_dir = src_dir / "hw"
-        hw_dir.mkdir(exist_ok=True)
-        
+        # These templates have no placeholders, so they are copied as-is (context None)
         # Only create PassThrough block (Top_Level.sv removed - it's unused and causes Verilator conflicts)
-        with open(hw_dir / "PassThrough.sv", "w") as f:
-            f.write(render_template("PassThrough.sv", {}))
-        print(f"✓ Created src/hw/PassThrough.sv")
+        emissions.append((hw_dir / "PassThrough.sv", "PassThrough.sv", None, False,
+                          "✓ Created src/hw/PassThrough.sv"))
         
-        copy_common_files(project_dir, hulotte_dir)
-
         # Generate Universal Simulation Wrapper from Templates
-        common_hw_dir = project_dir / "common" / "hw"
-        common_hw_dir.mkdir(parents=True, exist_ok=True)
-
-        with open(common_hw_dir / "universal_simulation_top.sv", "w") as f:
-             f.write(render_template("universal_simulation_top.sv.j2", {}))
-
-        with open(common_hw_dir / "VerilatorSimulation.hpp", "w") as f:
-             f.write(render_template("VerilatorSimulation.hpp.j2", {}))
-        
-        print(f"✓ Generated Verification environment (Universal Top & Verilator wrapper)")
+        emissions.append((common_hw_dir / "universal_simulation_top.sv", "universal_simulation_top.sv.j2", None, False,
+                          None))
+        emissions.append((common_hw_dir / "VerilatorSimulation.hpp", "VerilatorSimulation.hpp.j2", None, False,
+                          "✓ Generated Verification environment (Universal Top & Verilator wrapper)"))
 
     # Create CMakeLists.txt
     cmake_context = {
@@ -212,11 +336,8 @@ def create_project(hoot=False, project_name=None, use_streampu=None, use_aff3ct=
         "use_hw": use_hw,
         "use_streampu": use_streampu
     }
-    cmake_content = render_template("CMakeLists.txt.j2", cmake_context)
-    
-    with open(project_dir / "CMakeLists.txt", "w") as f:
-        f.write(cmake_content)
-    print(f"✓ Created CMakeLists.txt")
+    emissions.append((project_dir / "CMakeLists.txt", "CMakeLists.txt.j2", cmake_context, False,
+                      "✓ Created CMakeLists.txt"))
     
     # Create main.cpp
     main_context = {
@@ -226,88 +347,32 @@ def create_project(hoot=False, project_name=None, use_streampu=None, use_aff3ct=
         "use_hw": use_hw,
         "use_streampu": use_streampu
     }
-    main_content = render_template("main.cpp.j2", main_context)
-    with open(src_dir / "main.cpp", "w") as f:
-        f.write(main_content)
-    print(f"✓ Created src/main.cpp")
+    emissions.append((src_dir / "main.cpp", "main.cpp.j2", main_context, False,
+                      "✓ Created src/main.cpp"))
     
     # Create custom module if requested
     if use_custom:
-        custom_dir = src_dir / "custom"
-        custom_dir.mkdir(exist_ok=True)
-        
         context = {"module_name": "MyModule"}
-        header = render_template("MyModule.hpp.j2", context)
-        impl = render_template("MyModule.cpp.j2", context)
-        
-        with open(custom_dir / "MyModule.hpp", "w") as f:
-            f.write(header)
-        print(f"✓ Created src/custom/MyModule.hpp")
-        
-        with open(custom_dir / "MyModule.cpp", "w") as f:
-            f.write(impl)
-        print(f"✓ Created src/custom/MyModule.cpp")
+        emissions.append((custom_dir / "MyModule.hpp", "MyModule.hpp.j2", context, False,
+                          "✓ Created src/custom/MyModule.hpp"))
+        emissions.append((custom_dir / "MyModule.cpp", "MyModule.cpp.j2", context, False,
+                          "✓ Created src/custom/MyModule.cpp"))
     
     # Create .gitignore
-    gitignore = """build/
-*.a
-*.o
-*.so
-*.dylib
-*.exe
-.DS_Store
-cmake-build-debug/
-cmake-build-release/
-.idea/
-.vscode/
-obj_dir/
-"""
-    with open(project_dir / ".gitignore", "w") as f:
-        f.write(gitignore)
-    print(f"✓ Created .gitignore")
+    emissions.append((project_dir / ".gitignore", "gitignore.j2", {}, False,
+                      "✓ Created .gitignore"))
     
     # Create build script
-    cmake_args = f'-DSTREAMPU_ROOT="{streampu_dir}" \\'
-    if use_aff3ct:
-        cmake_args += f'\n    -DAFF3CT_ROOT="{aff3ct_dir}" \\'
-    
-    if use_hw:
-        # Try to find Verilator config path
-        verilator_prefix = "/usr/local/share/verilator"
-        if os.path.exists("/usr/share/verilator/verilator-config.cmake"):
-            verilator_prefix = "/usr/share/verilator"
-        
-        cmake_args += f'\n    -DCMAKE_PREFIX_PATH="{verilator_prefix}" \\'
-
-    build_script = f"""#!/bin/bash
-# Build script for {project_name}
-
-SCRIPT_DIR="$(cd "$(dirname "${{BASH_SOURCE[0]}}")" && pwd)"
-BUILD_DIR="${{SCRIPT_DIR}}/build"
-
-mkdir -p "${{BUILD_DIR}}"
-cd "${{BUILD_DIR}}"
-
-cmake .. \\
-    {cmake_args}
-    -DCMAKE_BUILD_TYPE=Release
-
-make -j$(nproc 2>/dev/null || sysctl -n hw.ncpu 2>/dev/null || echo 4)
-
-if [ $? -eq 0 ]; then
-    echo ""
-    echo "Build successful!"
-    echo "Run: ./build/{project_name}"
-else
-    echo "Build failed"
-    exit 1
-fi
-"""
-    build_script_path = project_dir / "build.sh"
-    with open(build_script_path, "w") as f:
-        f.write(build_script)
-    os.chmod(build_script_path, 0o755)
-    print(f"✓ Created build.sh")
+    build_context = {
+        "project_name": project_name,
+        "streampu_root": streampu_dir,
+        "aff3ct_root": aff3ct_dir,
+        "use_aff3ct": use_aff3ct,
+        "use_hw": use_hw,
+        "verilator_prefix": _verilator_prefix() if use_hw else None
+    }
+    emissions.append((project_dir / "build.sh", "build.sh.j2", build_context, True,
+                      "✓ Created build.sh"))
     
     # Create README
     readme_context = {
@@ -319,27 +384,32 @@ fi
         "use_custom": use_custom,
         "use_hw": use_hw
     }
-    readme = render_template("README.md.j2", readme_context)
-    with open(project_dir / "README.md", "w") as f:
-        f.write(readme)
-    print(f"✓ Created README.md")
+    emissions.append((project_dir / "README.md", "README.md.j2", readme_context, False,
+                      "✓ Created README.md"))
 
     # Create visualization script if HW is used
     if use_hw:
-        view_waves_content = render_template("view_waves.sh.j2", {
+        view_waves_context = {
             "project_name": project_name,
             "hulotte_root": hulotte_dir
-        })
-        view_waves_path = project_dir / "view_waves.sh"
-        with open(view_waves_path, "w") as f:
-            f.write(view_waves_content)
-        os.chmod(view_waves_path, 0o755)
-        print(f"✓ Created view_waves.sh")
+        }
+        emissions.append((project_dir / "view_waves.sh", "view_waves.sh.j2", view_waves_context, True,
+                          "✓ Created view_waves.sh"))
+    
+    # Every entry targets a distinct file, so they can be rendered and written concurrently
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(8, len(emissions))) as executor:
+        # list() re-raises the first write error, if any
+        list(executor.map(lambda emission: _emit(*emission[:4]), emissions))
+    created.extend(message for *_, message in emissions if message)
+    
+    if not quiet:
+        sys.stdout.write("\n".join(created) + "\n")
     
     # Summary
-    print("\n" + "="*60)
+    print("\n" + _SEP)
     print("PROJECT CREATED SUCCESSFULLY!")
-    print("="*60)
+    print(_SEP)
     print(f"\nProject: {project_name}")
     print(f"Location: {to_relative_path(project_dir)}")
     print(f"StreamPU: {to_relative_path(streampu_dir)}")
@@ -361,20 +431,14 @@ if __name__ == "__main__":
     parser.add_argument("positional_name", nargs="?", help="Project name")
     parser.add_argument("--name", dest="flag_name", help="Project name (via flag)")
     parser.add_argument("--hoot", action="store_true", help="Enable startup sound")
+    parser.add_argument("--quiet", action="store_true", help="Do not list the generated files")
     
-    # Enable/Disable arguments
-    
-    # AFF3CT
-    parser.add_argument("--aff3ct", action="store_const", const=True, dest="aff3ct", help="Enable AFF3CT support")
-    parser.add_argument("--no-aff3ct", action="store_const", const=False, dest="aff3ct", help="Disable AFF3CT support")
-    
-    # Custom Module
-    parser.add_argument("--custom", action="store_const", const=True, dest="custom", help="Enable custom module")
-    parser.add_argument("--no-custom", action="store_const", const=False, dest="custom", help="Disable custom module")
-    
-    # Hardware Simulation
-    parser.add_argument("--hw", action="store_const", const=True, dest="hw", help="Enable hardware simulation")
-    parser.add_argument("--no-hw", action="store_const", const=False, dest="hw", help="Disable hardware simulation")
+    # Enable/Disable arguments (--X / --no-X, left unset to ask interactively)
+    for flag, feature in (("aff3ct", "AFF3CT support"),
+                          ("custom", "custom module"),
+                          ("hw", "hardware simulation")):
+        parser.add_argument(f"--{flag}", action=argparse.BooleanOptionalAction, default=None,
+                            help=f"Enable or disable {feature}")
 
     parser.add_argument("--streampu-root", help="Path to StreamPU root")
     parser.add_argument("--aff3ct-root", help="Path to AFF3CT root")
@@ -393,6 +457,11 @@ if __name__ == "__main__":
     use_aff3ct   = args.aff3ct   if args.aff3ct is not None else (False if is_non_interactive else None)
     use_hw       = args.hw       if args.hw is not None else (False if is_non_interactive else None)
 
+    if not is_non_interactive:
+        # Compile the templates while the user answers the prompts
+        import threading
+        threading.Thread(target=_warm_templates, daemon=True).start()
+
     try:
         success = create_project(
             hoot=args.hoot,
@@ -402,7 +471,8 @@ if __name__ == "__main__":
             use_custom=use_custom,
             use_hw=use_hw,
             streampu_root=args.streampu_root,
-            aff3ct_root=args.aff3ct_root
+            aff3ct_root=args.aff3ct_root,
+            quiet=args.quiet
         )
         sys.exit(0 if success else 1)
     except KeyboardInterrupt:
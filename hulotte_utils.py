@@ -5,15 +5,22 @@ Shared utilities for Hulotte scripts.
 
 import os
 import sys
-import math
-import wave
-import struct
+import atexit
+import functools
+import threading
 import shutil
-import subprocess
-import tempfile
 from pathlib import Path
 
 
+# Directory holding this file and the bundled assets (hulotte.txt, hulotte.wav)
+_MODULE_DIR = Path(__file__).resolve().parent
+_WAV_PATH = _MODULE_DIR / "hulotte.wav"
+
+# HULOTTE_QUIET=1 turns off the decorations (ASCII art banner, owl hoot), as do CI runners
+_QUIET = (os.environ.get("HULOTTE_QUIET") == "1"
+          or os.environ.get("CI", "").strip().lower() not in ("", "0", "false", "no", "off"))
+
+
 class Colors:
     """ANSI color codes for terminal output"""
     HEADER = '\033[95m'
@@ -26,60 +33,111 @@ class Colors:
     BOLD = '\033[1m'
 
 
+# No ANSI codes when stdout is not a terminal or NO_COLOR (https://no-color.org) is set
+if os.environ.get("NO_COLOR") or not (sys.stdout and sys.stdout.isatty()):
+    for _name in ("HEADER", "OKBLUE", "OKCYAN", "OKGREEN", "WARNING", "FAIL", "ENDC", "BOLD"):
+        setattr(Colors, _name, "")
+
+
+# Message prefixes/suffixes, assembled once instead of on every call
+_HEADER_BAR = f"{Colors.HEADER}{Colors.BOLD}{'=' * 60}{Colors.ENDC}\n"
+_HEADER_PREFIX = f"{Colors.HEADER}{Colors.BOLD}"
+_SUCCESS_PREFIX = f"{Colors.OKGREEN}✓ "
+_INFO_PREFIX = f"{Colors.OKCYAN}ℹ "
+_WARNING_PREFIX = f"{Colors.WARNING}⚠ "
+_ERROR_PREFIX = f"{Colors.FAIL}✗ "
+_SUFFIX = f"{Colors.ENDC}\n"
+
+
 def print_header(text):
     """Print a colored header"""
-    print(f"\n{Colors.HEADER}{Colors.BOLD}{'='*60}{Colors.ENDC}")
-    print(f"{Colors.HEADER}{Colors.BOLD}{text.center(60)}{Colors.ENDC}")
-    print(f"{Colors.HEADER}{Colors.BOLD}{'='*60}{Colors.ENDC}\n")
+    sys.stdout.write("\n" + _HEADER_BAR + _HEADER_PREFIX + text.center(60) + _SUFFIX + _HEADER_BAR + "\n")
 
 
 def print_success(text):
     """Print a success message"""
-    print(f"{Colors.OKGREEN}✓ {text}{Colors.ENDC}")
+    sys.stdout.write(_SUCCESS_PREFIX + text + _SUFFIX)
 
 
 def print_info(text):
     """Print an info message"""
-    print(f"{Colors.OKCYAN}ℹ {text}{Colors.ENDC}")
+    sys.stdout.write(_INFO_PREFIX + text + _SUFFIX)
 
 
 def print_warning(text):
     """Print a warning message"""
-    print(f"{Colors.WARNING}⚠ {text}{Colors.ENDC}")
+    sys.stdout.write(_WARNING_PREFIX + text + _SUFFIX)
 
 
 def print_error(text):
     """Print an error message"""
-    print(f"{Colors.FAIL}✗ {text}{Colors.ENDC}")
+    sys.stdout.write(_ERROR_PREFIX + text + _SUFFIX)
+
+
+@functools.lru_cache(maxsize=1)
+def _cwd():
+    """Current directory (the scripts never chdir, so it is computed once)."""
+    return os.getcwd()
 
 
+@functools.lru_cache(maxsize=128)
 def to_relative_path(path):
     """Convert absolute path to relative path from current directory."""
     try:
-        path_obj = Path(path).resolve()
-        cwd = Path.cwd().resolve()
-        try:
-            rel_path = path_obj.relative_to(cwd)
-            return f"./{rel_path}" if str(rel_path) != "." else "."
-        except ValueError:
-            # Path is not relative to cwd, return as-is
-            return str(path)
-    except:
+        # Pure string computation: no stat()/readlink() on the path components
+        rel = os.path.relpath(os.fspath(path), _cwd())
+    except (TypeError, ValueError):
+        return str(path)
+    if rel == os.curdir:
+        return "."
+    if rel == os.pardir or rel.startswith(os.pardir + os.sep):
+        # Path is not relative to cwd, return as-is
         return str(path)
+    return "./" + rel
+
+
+@functools.lru_cache(maxsize=1)
+def _ascii_art():
+    """Raw bytes of hulotte.txt (read once per process), or b"" if it is missing."""
+    try:
+        return (_MODULE_DIR / "hulotte.txt").read_bytes()
+    except OSError:
+        return b""
 
 
 def print_ascii_art():
-    """Print hulotte ASCII art if available."""
+    """Print hulotte ASCII art if available (only on a terminal)."""
+    if _QUIET or not sys.stdout.isatty():
+        return
     try:
-        art_path = Path(__file__).resolve().parent / "hulotte.txt"
-        if art_path.exists():
-            print(art_path.read_text(encoding="utf-8"))
+        art = _ascii_art()
+        if art:
+            # Write the raw UTF-8 bytes to stdout instead of decoding/re-encoding them
+            sys.stdout.flush()
+            sys.stdout.buffer.write(art + b"\n")
     except Exception:
         pass
 
 
+# Command-line WAV players, in order of preference
+_PLAYERS = {
+    "darwin": (("afplay",),),
+    "default": (("paplay",), ("aplay", "-q"), ("play", "-q")),
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _find_player():
+    """Return the command prefix of the first available WAV player, or None."""
+    candidates = _PLAYERS.get(sys.platform, _PLAYERS["default"])
+    for command in candidates:
+        if shutil.which(command[0]):
+            return command
+    return None
+
+
 def play_wav_file(wav_path):
-    """Play a WAV file (best-effort)."""
+    """Play a WAV file (best-effort, returns without waiting except on Windows)."""
     if sys.platform.startswith("win"):
         try:
             import winsound
@@ -87,19 +145,13 @@ def play_wav_file(wav_path):
         except Exception:
             print("\a", end="")
         return
-    if sys.platform == "darwin":
-        if shutil.which("afplay"):
-            subprocess.run(["afplay", str(wav_path)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        else:
-            print("\a", end="")
-        return
 
-    if shutil.which("paplay"):
-        subprocess.run(["paplay", str(wav_path)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    elif shutil.which("aplay"):
-        subprocess.run(["aplay", "-q", str(wav_path)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    elif shutil.which("play"):
-        subprocess.run(["play", "-q", str(wav_path)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    player = _find_player()
+    if player:
+        import subprocess
+        # Don't wait for the player: in its own session it keeps playing after we exit
+        subprocess.Popen([*player, str(wav_path)], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                         stderr=subprocess.DEVNULL, start_new_session=True)
     else:
         print("\a", end="")
 
@@ -107,9 +159,19 @@ def play_wav_file(wav_path):
 def play_owl_hoot():
     """Play the hulotte.wav sound file."""
     try:
-        local_wav = Path(__file__).resolve().parent / "hulotte.wav"
-
-        if local_wav.exists():
-            play_wav_file(local_wav)
+        if _WAV_PATH.exists():
+            play_wav_file(_WAV_PATH)
     except Exception:
         print("\a", end="")
+
+
+def play_owl_hoot_in_background():
+    """Play the hulotte sound in a daemon thread so the caller is not blocked."""
+    # --hoot is opt-in, so it still plays when the output is piped (e.g. through tee)
+    if _QUIET:
+        return None
+    thread = threading.Thread(target=play_owl_hoot, daemon=True)
+    thread.start()
+    # Let the player be spawned (or, on Windows, the hoot finish) if the script is done first
+    atexit.register(thread.join, timeout=5)
+    return thread
@@ -6,50 +6,88 @@ Interactive script to install AFF3CT and StreamPU dependencies
 
 import os
 import sys
+import json
+import time
 import argparse
+import collections
+import functools
+import shlex
 import shutil
 import subprocess
-import zipfile
 from pathlib import Path
 from hulotte_utils import (
     to_relative_path, Colors, print_header, print_success, print_info, 
-    print_warning, print_error, print_ascii_art, play_owl_hoot
+    print_warning, print_error, print_ascii_art, play_owl_hoot_in_background
 )
 
 
-def run_command(cmd, cwd=None, show_output=True):
+def run_command(cmd, cwd=None, show_output=True, log_file=None):
     """
-    Run a shell command and return success status
+    Run a command (argv list, no shell) and return success status.
+    With log_file, the output is appended to that file and its tail is shown on failure.
     """
+    if log_file:
+        return _run_logged(cmd, cwd, log_file)
     try:
         if show_output:
             result = subprocess.run(
                 cmd,
                 cwd=cwd,
-                shell=True,
                 check=True
             )
         else:
             result = subprocess.run(
                 cmd,
                 cwd=cwd,
-                shell=True,
                 check=True,
-                stdout=subprocess.PIPE,
+                # Only stderr is shown (on failure): don't buffer stdout in memory
+                stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE
             )
         return True
     except subprocess.CalledProcessError as e:
-        print_error(f"Command failed: {cmd}")
+        print_error(f"Command failed: {shlex.join(cmd)}")
         if not show_output and e.stderr:
             print(e.stderr.decode())
         return False
+    except OSError as e:
+        print_error(f"Command failed: {shlex.join(cmd)} ({e})")
+        return False
+
+
+def _run_logged(cmd, cwd, log_file, tail_lines=40):
+    """Run a command with its stdout and stderr appended to log_file"""
+    try:
+        with open(log_file, 'ab') as log:
+            subprocess.run(cmd, cwd=cwd, check=True, stdout=log, stderr=subprocess.STDOUT)
+        return True
+    except subprocess.CalledProcessError:
+        print_error(f"Command failed: {shlex.join(cmd)} (full output in {to_relative_path(log_file)})")
+        with open(log_file, 'rb') as log:
+            tail = collections.deque(log, maxlen=tail_lines)
+        sys.stdout.write(b"".join(tail).decode(errors="replace"))
+        return False
+    except OSError as e:
+        print_error(f"Command failed: {shlex.join(cmd)} ({e})")
+        return False
+
+
+# Accepted answers (English and French)
+_YES = frozenset({'y', 'yes', 'oui', 'o'})
+_NO = frozenset({'n', 'no', 'non'})
+
+# Non-interactive mode (--yes): every question takes its default answer
+ASSUME_YES = False
+# Versions chosen on the command line, by repository name ("AFF3CT", "StreamPU")
+PINNED_TAGS = {}
 
 
 def ask_yes_no(question, default=True):
     """
     Ask a yes/no question and return boolean
     """
+    if ASSUME_YES:
+        return default
     if default:
         prompt = f"{question} [Y/n]: "
     else:
@@ -59,9 +97,9 @@ def ask_yes_no(question, default=True):
         response = input(prompt).strip().lower()
         if response == '':
             return default
-        elif response in ['y', 'yes', 'oui', 'o']:
+        elif response in _YES:
             return True
-        elif response in ['n', 'no', 'non']:
+        elif response in _NO:
             return False
         else:
             print_warning("Please answer 'y' or 'n'")
@@ -69,40 +107,110 @@ def ask_yes_no(question, default=True):
 
 def get_cpu_cores():
     """Get number of CPU cores for parallel compilation"""
+    # An explicit job count from the user wins
+    level = os.environ.get("CMAKE_BUILD_PARALLEL_LEVEL", "")
+    if level.isdigit() and int(level) > 0:
+        return level
+    try:
+        # Only the cores this process may run on (taskset, cgroup cpusets in containers)
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        # sched_getaffinity() is Linux-only
+        cores = os.cpu_count() or 4
+    # Leave ~10% of the cores to the rest of the system
+    return str(max(1, int(cores * 0.9)))
+
+
+def cap_jobs_to_memory(cores, gib_per_job=2):
+    """Limit parallel compile jobs so that each has gib_per_job GiB of available memory (Linux only)"""
     try:
-        return str(os.cpu_count())
-    except:
-        return "4"
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    available_gib = int(line.split()[1]) / (1024 * 1024)
+                    return str(max(1, min(int(cores), int(available_gib // gib_per_job))))
+    except (OSError, ValueError):
+        pass
+    return cores
+
 
+# How long a cached `git ls-remote` answer stays valid (seconds)
+LS_REMOTE_CACHE_TTL = 30 * 60
 
-def get_latest_tag(repo_url):
-    """Fetch latest tag from a git repository."""
+
+def _load_ls_remote_cache(cache_file):
+    """Load the {repo_url: {"tag", "timestamp"}} cache, or {} if missing/unreadable."""
+    try:
+        with open(cache_file) as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def get_latest_tag(repo_url, cache_dir=None):
+    """
+    Fetch latest tag from a git repository.
+    When cache_dir is given, answers younger than LS_REMOTE_CACHE_TTL are reused.
+    """
+    cache_file = cache_dir / "ls-remote.json" if cache_dir else None
+    if cache_file:
+        entry = _load_ls_remote_cache(cache_file).get(repo_url)
+        if isinstance(entry, dict) and isinstance(entry.get("tag"), str) and entry["tag"]:
+            # A malformed timestamp is a cache miss
+            timestamp = entry.get("timestamp")
+            if (isinstance(timestamp, (int, float))
+                    and time.time() - timestamp < LS_REMOTE_CACHE_TTL):
+                return entry["tag"]
+
+    tag = _fetch_latest_tag(repo_url)
+
+    if cache_file and tag:
+        cache = _load_ls_remote_cache(cache_file)
+        cache[repo_url] = {"tag": tag, "timestamp": time.time()}
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(cache_file, 'w') as f:
+                json.dump(cache, f, indent=2)
+        except OSError:
+            pass
+    return tag
+
+
+def _fetch_latest_tag(repo_url):
+    """Ask the remote for its latest tag with `git ls-remote`."""
     try:
         result = subprocess.run(
-            ["git", "ls-remote", "--tags", "--sort=-version:refname", repo_url],
+            # Protocol v2 lets the server filter the advertisement down to the tags
+            ["git", "-c", "protocol.version=2", "ls-remote", "--refs", "--tags",
+             "--sort=-version:refname", repo_url],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             timeout=10
         )
         if result.returncode == 0:
-            lines = result.stdout.decode().split('\n')
-            for line in lines:
-                if line.strip():
-                    tag = line.split('refs/tags/')[-1].rstrip('^{}')
-                    if tag and not tag.endswith('^{}'):
-                        return tag
+            # --refs leaves out the peeled "^{}" entries: the first tag is the latest one
+            for line in result.stdout.decode().splitlines():
+                if "refs/tags/" in line:
+                    return line.split("refs/tags/", 1)[1]
     except Exception as e:
         print_warning(f"Could not fetch tags: {e}")
     return None
 
 
-def choose_version(repo_url, repo_name="repository"):
+def choose_version(repo_url, repo_name="repository", cache_dir=None):
     """Let user choose a version tag (default to latest)."""
-    latest_tag = get_latest_tag(repo_url)
+    pinned_tag = PINNED_TAGS.get(repo_name)
+    if pinned_tag:
+        # No need to ask the remote for its tags
+        print_info(f"Using {repo_name} version: {pinned_tag}")
+        return pinned_tag
+    
+    latest_tag = get_latest_tag(repo_url, cache_dir)
     
     if latest_tag:
         print_info(f"Latest {repo_name} version: {latest_tag}")
-        if ask_yes_no(f"Use {latest_tag}?", default=True):
+        if ASSUME_YES or ask_yes_no(f"Use {latest_tag}?", default=True):
             return latest_tag
         
         custom_tag = input(f"Enter {repo_name} tag/branch (or empty for default): ").strip()
@@ -111,89 +219,187 @@ def choose_version(repo_url, repo_name="repository"):
         return latest_tag
     else:
         print_warning(f"Could not determine latest {repo_name} version, using default")
+        if ASSUME_YES:
+            return None
         custom_tag = input(f"Enter {repo_name} tag/branch (or empty for main/master): ").strip()
         return custom_tag if custom_tag else None
 
 
-def check_git():
-    """Check if git is installed"""
-    print_info("Checking for git...")
-    result = subprocess.run(
-        ["which", "git"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
-    if result.returncode != 0:
-        print_error("git is not installed!")
-        print_info("Please install git: sudo apt-get install git")
-        return False
-    print_success("git found")
-    return True
+# Build prerequisites: (tool, package providing it)
+REQUIRED = [
+    ("git", "git"),
+    ("cmake", "cmake"),
+    ("g++", "build-essential"),
+]
 
 
-def check_cmake():
-    """Check if cmake is installed"""
-    print_info("Checking for cmake...")
-    result = subprocess.run(
-        ["which", "cmake"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
-    if result.returncode != 0:
-        print_error("cmake is not installed!")
-        print_info("Please install cmake: sudo apt-get install cmake")
-        return False
-    print_success("cmake found")
-    return True
+def check_prerequisites():
+    """Check that every required tool is installed"""
+    missing = []
+    for tool, package in REQUIRED:
+        print_info(f"Checking for {tool}...")
+        if shutil.which(tool):
+            print_success(f"{tool} found")
+        else:
+            print_error(f"{tool} is not installed!")
+            print_info(f"Please install {tool}: sudo apt-get install {package}")
+            missing.append(tool)
+    return not missing
 
 
-def check_compiler():
-    """Check if g++ is installed"""
-    print_info("Checking for g++...")
-    result = subprocess.run(
-        ["which", "g++"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
-    if result.returncode != 0:
-        print_error("g++ is not installed!")
-        print_info("Please install g++: sudo apt-get install build-essential")
-        return False
-    print_success("g++ found")
-    return True
+@functools.lru_cache(maxsize=1)
+def cmake_tool_args():
+    """
+    Extra CMake arguments for the build tools found on this machine
+    (looked up once, so the ccache tip is only printed once)
+    """
+    args = []
+    # Ninja schedules a large C++ build better than make
+    if shutil.which("ninja"):
+        args += ["-G", "Ninja"]
+    # ccache makes reinstalls (and retries after a failed build) nearly free
+    if shutil.which("ccache"):
+        args += ["-DCMAKE_C_COMPILER_LAUNCHER=ccache", "-DCMAKE_CXX_COMPILER_LAUNCHER=ccache"]
+    else:
+        print_info("Tip: install ccache to speed up rebuilds (sudo apt-get install ccache)")
+    # A tuple: the cached value must not be modified by the callers
+    return tuple(args)
+
 
+AFF3CT_URL = "https://github.com/aff3ct/aff3ct.git"
+STREAMPU_URL = "https://github.com/aff3ct/streampu.git"
 
-def install_aff3ct(hulotte_root):
+
+def prepare_install(repo_url, repo_dir, repo_name, cache_dir=None):
     """
-    Install AFF3CT with StreamPU as static library
+    Choose the version to install and make room for the clone.
+    Returns (True, tag), or (False, None) if the existing checkout is kept.
     """
-    print_header("Installing AFF3CT with StreamPU")
+    tag = choose_version(repo_url, repo_name, cache_dir)
     
-    aff3ct_url = "https://github.com/aff3ct/aff3ct.git"
-    aff3ct_tag = choose_version(aff3ct_url, "AFF3CT")
+    # Check if the repository already exists
+    if repo_dir.exists():
+        print_warning(f"{repo_name} directory already exists: {to_relative_path(repo_dir)}")
+        # A version pinned on the command line is a request to replace the checkout
+        if not ask_yes_no("Do you want to delete and reinstall?", default=repo_name in PINNED_TAGS):
+            print_info(f"Skipping {repo_name} installation")
+            return False, None
+        print_info(f"Removing existing {repo_name} directory...")
+        shutil.rmtree(repo_dir, ignore_errors=True)
     
-    aff3ct_dir = hulotte_root / "aff3ct"
+    return True, tag
+
+
+def clone_repository(repo_url, tag, hulotte_root, repo_name, full_clone=False, show_output=True):
+    """
+    Clone a repository (at the given tag, if any) into hulotte_root
+    """
+    print_info(f"Cloning {repo_name} repository...")
+    clone_cmd = ["git", "clone", "--recursive", repo_url]
+    if tag:
+        clone_cmd += ["--branch", tag]
+        if not full_clone:
+            # Building a tag needs no history, for the repository or its submodules
+            clone_cmd += ["--single-branch", "--depth=1", "--shallow-submodules"]
+    elif not full_clone:
+        # Without a tag, AFF3CT derives its version from `git describe`: keep every
+        # commit and tag, but only download the file contents of the checked-out revision
+        clone_cmd += ["--filter=blob:none"]
+    
+    if not run_command(clone_cmd, cwd=hulotte_root, show_output=show_output):
+        print_error(f"Failed to clone {repo_name}")
+        return False
     
-    # Check if AFF3CT already exists
-    if aff3ct_dir.exists():
-        print_warning(f"AFF3CT directory already exists: {to_relative_path(aff3ct_dir)}")
-        if not ask_yes_no("Do you want to delete and reinstall?", default=False):
-            print_info("Skipping AFF3CT installation")
+    print_success(f"{repo_name} cloned successfully")
+    return True
+
+
+def _checkout_refs(repo_dir):
+    """Return the names HEAD is checked out at in repo_dir: its exact tag and/or its branch"""
+    refs = set()
+    for cmd in (["describe", "--tags", "--exact-match"], ["rev-parse", "--abbrev-ref", "HEAD"]):
+        try:
+            result = subprocess.run(["git", "-C", str(repo_dir), *cmd],
+                                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        except OSError:
+            break
+        # rev-parse answers "HEAD" for a detached checkout
+        if result.returncode == 0 and result.stdout.strip() not in ("", "HEAD"):
+            refs.add(result.stdout.strip())
+    return refs
+
+
+def find_reusable_build(repo_dir, repo_name, find_build, force_reinstall=False):
+    """
+    Return the info of the build in repo_dir if it can be reused as is, or None.
+    A build is only reused if it is at the tag/branch pinned on the command line (if any).
+    """
+    if force_reinstall:
+        return None
+    info = find_build(repo_dir)
+    pinned_tag = PINNED_TAGS.get(repo_name)
+    if info and pinned_tag and pinned_tag not in _checkout_refs(repo_dir):
+        print_info(f"{repo_name} build in {to_relative_path(repo_dir)} is not at version {pinned_tag}, reinstalling it")
+        return None
+    return info
+
+
+def find_aff3ct_build(aff3ct_dir):
+    """
+    Return the installation info of the AFF3CT build in aff3ct_dir, or None if its library is missing
+    """
+    lib_dir = aff3ct_dir / "build" / "lib"
+    lib_file = lib_dir / "libaff3ct-4.1.0.a"
+    if not lib_file.exists():
+        # Try to find the library with any version
+        lib_files = list(lib_dir.glob("libaff3ct-*.a"))
+        if not lib_files:
             return None
-        print_info("Removing existing AFF3CT directory...")
-        run_command(f"rm -rf {aff3ct_dir}")
+        lib_file = lib_files[0]
     
-    # Clone AFF3CT
-    print_info("Cloning AFF3CT repository...")
-    clone_cmd = f"git clone --recursive {aff3ct_url}"
-    if aff3ct_tag:
-        clone_cmd += f" --branch {aff3ct_tag}"
+    info = {
+        "aff3ct_root": str(aff3ct_dir.resolve()),
+        "aff3ct_lib": str(lib_file.resolve())
+    }
     
-    if not run_command(clone_cmd, cwd=hulotte_root):
-        print_error("Failed to clone AFF3CT")
+    # Check for StreamPU
+    streampu_lib = lib_dir / "streampu" / "lib" / "libstreampu.a"
+    if streampu_lib.exists():
+        info["streampu_root"] = str((aff3ct_dir / "lib" / "streampu").resolve())
+        info["streampu_lib"] = str(streampu_lib.resolve())
+    return info
+
+
+def report_aff3ct_build(info):
+    """
+    Print which libraries an AFF3CT build provides
+    """
+    print_success(f"AFF3CT library found: {Path(info['aff3ct_lib']).name}")
+    if "streampu_lib" in info:
+        print_success(f"StreamPU library found (compiled with AFF3CT)")
+    else:
+        print_warning("StreamPU library not found in AFF3CT build")
+
+
+def find_streampu_build(streampu_dir):
+    """
+    Return the installation info of the StreamPU build in streampu_dir, or None if its library is missing
+    """
+    lib_file = streampu_dir / "build" / "lib" / "libstreampu.a"
+    if not lib_file.exists():
         return None
-    
-    print_success("AFF3CT cloned successfully")
+    return {
+        "streampu_root": str(streampu_dir.resolve()),
+        "streampu_lib": str(lib_file.resolve())
+    }
+
+
+def build_aff3ct(hulotte_root, cores=None, gib_per_job=2):
+    """
+    Build a cloned AFF3CT (with StreamPU) as static library, with up to cores compile jobs (default: all)
+    and gib_per_job GiB of available memory for each of them
+    """
+    aff3ct_dir = hulotte_root / "aff3ct"
     
     # Create build directory
     build_dir = aff3ct_dir / "build"
@@ -201,16 +407,17 @@ def install_aff3ct(hulotte_root):
     
     # Configure with CMake
     print_info("Configuring AFF3CT with CMake...")
-    cmake_cmd = (
-        "cmake .. "
-        "-DCMAKE_BUILD_TYPE=Release "
-        "-DAFF3CT_COMPILE_EXE=OFF "
-        "-DAFF3CT_COMPILE_STATIC_LIB=ON "
-        "-DAFF3CT_COMPILE_SHARED_LIB=OFF "
-        "-DAFF3CT_LINK_HWLOC=OFF "
-        "-DAFF3CT_EXT_STRINGS=ON "
-        "-DSPU_COMPILE_STATIC_LIB=ON "
-    )
+    cmake_cmd = [
+        "cmake", "..",
+        "-DCMAKE_BUILD_TYPE=Release",
+        "-DAFF3CT_COMPILE_EXE=OFF",
+        "-DAFF3CT_COMPILE_STATIC_LIB=ON",
+        "-DAFF3CT_COMPILE_SHARED_LIB=OFF",
+        "-DAFF3CT_LINK_HWLOC=OFF",
+        "-DAFF3CT_EXT_STRINGS=ON",
+        "-DSPU_COMPILE_STATIC_LIB=ON",
+    ]
+    cmake_cmd += cmake_tool_args()
     
     if not run_command(cmake_cmd, cwd=build_dir):
         print_error("CMake configuration failed")
@@ -219,125 +426,188 @@ def install_aff3ct(hulotte_root):
     print_success("CMake configuration successful")
     
     # Compile
-    cores = get_cpu_cores()
+    # AFF3CT's heavily templated translation units need a lot of memory each
+    max_load = get_cpu_cores()
+    cores = cap_jobs_to_memory(cores or max_load, gib_per_job)
     print_info(f"Compiling AFF3CT (using {cores} cores)...")
     print_info("This may take several minutes...")
     
-    if not run_command(f"make -j{cores}", cwd=build_dir):
+    if not run_command(["cmake", "--build", ".", "--parallel", cores, "--", f"-l{max_load}"], cwd=build_dir):
         print_error("AFF3CT compilation failed")
         return None
     
     print_success("AFF3CT compiled successfully")
     
     # Verify installation
-    lib_file = build_dir / "lib" / "libaff3ct-4.1.0.a"
-    if not lib_file.exists():
-        # Try to find the library with any version
-        lib_files = list((build_dir / "lib").glob("libaff3ct-*.a"))
-        if lib_files:
-            lib_file = lib_files[0]
-            print_success(f"AFF3CT library found: {lib_file.name}")
-        else:
-            print_error("AFF3CT library not found after compilation")
-            return None
-    else:
-        print_success(f"AFF3CT library found: {lib_file.name}")
+    info = find_aff3ct_build(aff3ct_dir)
+    if info is None:
+        print_error("AFF3CT library not found after compilation")
+        return None
     
-    # Check for StreamPU
-    streampu_lib = build_dir / "lib" / "streampu" / "lib" / "libstreampu.a"
-    if streampu_lib.exists():
-        print_success(f"StreamPU library found (compiled with AFF3CT)")
-        return {
-            "aff3ct_root": str(aff3ct_dir.resolve()),
-            "streampu_root": str((aff3ct_dir / "lib" / "streampu").resolve()),
-            "aff3ct_lib": str(lib_file.resolve()),
-            "streampu_lib": str(streampu_lib.resolve())
-        }
-    else:
-        print_warning("StreamPU library not found in AFF3CT build")
-        return {
-            "aff3ct_root": str(aff3ct_dir.resolve()),
-            "aff3ct_lib": str(lib_file.resolve())
-        }
+    report_aff3ct_build(info)
+    return info
 
 
-def install_streampu(hulotte_root):
+def build_streampu(hulotte_root, cores=None, log_to_file=False):
     """
-    Install StreamPU as standalone static library
+    Build a cloned StreamPU as standalone static library, with up to cores compile jobs (default: all).
+    With log_to_file, the CMake output goes to build/build.log instead of the terminal.
     """
-    print_header("Installing StreamPU (standalone)")
-    
-    streampu_url = "https://github.com/aff3ct/streampu.git"
-    streampu_tag = choose_version(streampu_url, "StreamPU")
-    
     streampu_dir = hulotte_root / "streampu"
     
-    # Check if StreamPU already exists
-    if streampu_dir.exists():
-        print_warning(f"StreamPU directory already exists: {to_relative_path(streampu_dir)}")
-        if not ask_yes_no("Do you want to delete and reinstall?", default=False):
-            print_info("Skipping StreamPU installation")
-            return None
-        print_info("Removing existing StreamPU directory...")
-        run_command(f"rm -rf {streampu_dir}")
-    
-    # Clone StreamPU
-    print_info("Cloning StreamPU repository...")
-    clone_cmd = f"git clone --recursive {streampu_url}"
-    if streampu_tag:
-        clone_cmd += f" --branch {streampu_tag}"
-    
-    if not run_command(clone_cmd, cwd=hulotte_root):
-        print_error("Failed to clone StreamPU")
-        return None
-    
-    print_success("StreamPU cloned successfully")
     # Create build directory
     build_dir = streampu_dir / "build"
     build_dir.mkdir(exist_ok=True)
+    log_file = build_dir / "build.log" if log_to_file else None
+    if log_file:
+        log_file.unlink(missing_ok=True)
     
     # Configure with CMake
     print_info("Configuring StreamPU with CMake...")
-    cmake_cmd = (
-        "cmake .. "
-        "-DCMAKE_BUILD_TYPE=Release "
-        "-DSPU_COMPILE_STATIC_LIB=ON "
-        "-DSPU_COMPILE_SHARED_LIB=OFF "
-        "-DSPU_LINK_HWLOC=OFF "
-    )
-    
-    if not run_command(cmake_cmd, cwd=build_dir):
+    cmake_cmd = [
+        "cmake", "..",
+        "-DCMAKE_BUILD_TYPE=Release",
+        "-DSPU_COMPILE_STATIC_LIB=ON",
+        "-DSPU_COMPILE_SHARED_LIB=OFF",
+        "-DSPU_LINK_HWLOC=OFF",
+    ]
+    cmake_cmd += cmake_tool_args()
+    
+    if not run_command(cmake_cmd, cwd=build_dir, log_file=log_file):
         print_error("CMake configuration failed")
         return None
     
     print_success("CMake configuration successful")
     
     # Compile
-    cores = get_cpu_cores()
+    max_load = get_cpu_cores()
+    cores = cores or max_load
     print_info(f"Compiling StreamPU (using {cores} cores)...")
     
-    if not run_command(f"make -j{cores}", cwd=build_dir):
+    if not run_command(["cmake", "--build", ".", "--parallel", cores, "--", f"-l{max_load}"],
+                       cwd=build_dir, log_file=log_file):
         print_error("StreamPU compilation failed")
         return None
     
     print_success("StreamPU compiled successfully")
     
     # Verify installation
-    lib_file = build_dir / "lib" / "libstreampu.a"
-    if not lib_file.exists():
+    info = find_streampu_build(streampu_dir)
+    if info is None:
         print_error("StreamPU library not found after compilation")
         return None
     
-    print_success(f"StreamPU library found: {lib_file}")
+    print_success(f"StreamPU library found: {info['streampu_lib']}")
+    return info
+
+
+def install_aff3ct(hulotte_root, cache_dir=None, full_clone=False, force_reinstall=False):
+    """
+    Install AFF3CT with StreamPU as static library
+    """
+    print_header("Installing AFF3CT with StreamPU")
     
-    return {
-        "streampu_root": str(streampu_dir.resolve()),
-        "streampu_lib": str(lib_file.resolve())
-    }
+    aff3ct_dir = hulotte_root / "aff3ct"
+    info = find_reusable_build(aff3ct_dir, "AFF3CT", find_aff3ct_build, force_reinstall)
+    if info:
+        print_success(f"AFF3CT is already built in {to_relative_path(aff3ct_dir)} (use --force-reinstall to rebuild it)")
+        report_aff3ct_build(info)
+        return info
+    
+    proceed, tag = prepare_install(AFF3CT_URL, aff3ct_dir, "AFF3CT", cache_dir)
+    if not proceed or not clone_repository(AFF3CT_URL, tag, hulotte_root, "AFF3CT", full_clone):
+        return None
+    return build_aff3ct(hulotte_root)
+
+
+def install_streampu(hulotte_root, cache_dir=None, full_clone=False, force_reinstall=False):
+    """
+    Install StreamPU as standalone static library
+    """
+    print_header("Installing StreamPU (standalone)")
+    
+    streampu_dir = hulotte_root / "streampu"
+    info = find_reusable_build(streampu_dir, "StreamPU", find_streampu_build, force_reinstall)
+    if info:
+        print_success(f"StreamPU is already built in {to_relative_path(streampu_dir)} (use --force-reinstall to rebuild it)")
+        return info
+    
+    proceed, tag = prepare_install(STREAMPU_URL, streampu_dir, "StreamPU", cache_dir)
+    if not proceed or not clone_repository(STREAMPU_URL, tag, hulotte_root, "StreamPU", full_clone):
+        return None
+    return build_streampu(hulotte_root)
 
 
-def install_surfer(hulotte_root):
+def install_aff3ct_and_streampu(hulotte_root, cache_dir=None, full_clone=False, force_reinstall=False,
+                                serial=False):
+    """
+    Install AFF3CT and standalone StreamPU: both clones run at once, then both builds
+    (each on half of the cores), unless serial is set
+    """
+    aff3ct_dir = hulotte_root / "aff3ct"
+    streampu_dir = hulotte_root / "streampu"
+    aff3ct_existing = find_reusable_build(aff3ct_dir, "AFF3CT", find_aff3ct_build, force_reinstall)
+    streampu_existing = find_reusable_build(streampu_dir, "StreamPU", find_streampu_build, force_reinstall)
+    
+    # An existing build is reused as is, which leaves at most one clone: nothing to overlap
+    if aff3ct_existing or streampu_existing:
+        return (install_aff3ct(hulotte_root, cache_dir, full_clone, force_reinstall),
+                install_streampu(hulotte_root, cache_dir, full_clone, force_reinstall))
+    
+    print_header("Installing AFF3CT with StreamPU")
+    aff3ct_ok, aff3ct_tag = prepare_install(AFF3CT_URL, aff3ct_dir, "AFF3CT", cache_dir)
+    
+    print_header("Installing StreamPU (standalone)")
+    streampu_ok, streampu_tag = prepare_install(STREAMPU_URL, streampu_dir, "StreamPU", cache_dir)
+    
+    # The clones are network-bound and independent; their output is captured
+    # (and only shown on failure) so the two progress displays don't interleave
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        aff3ct_clone = aff3ct_ok and executor.submit(
+            clone_repository, AFF3CT_URL, aff3ct_tag, hulotte_root, "AFF3CT", full_clone, False)
+        streampu_clone = streampu_ok and executor.submit(
+            clone_repository, STREAMPU_URL, streampu_tag, hulotte_root, "StreamPU", full_clone, False)
+    
+    aff3ct_cloned = bool(aff3ct_clone and aff3ct_clone.result())
+    streampu_cloned = bool(streampu_clone and streampu_clone.result())
+    
+    total_cores = int(get_cpu_cores())
+    if serial or total_cores < 2 or not (aff3ct_cloned and streampu_cloned):
+        # One build at a time, each on every core
+        aff3ct_info = build_aff3ct(hulotte_root) if aff3ct_cloned else None
+        streampu_info = build_streampu(hulotte_root) if streampu_cloned else None
+        return aff3ct_info, streampu_info
+    
+    # Split the cores between the two builds: the link and configure steps of one
+    # leave cores idle that the other build's compile jobs can use.
+    # StreamPU's output goes to its build.log (tail shown on failure) so the logs don't interleave
+    half = str(total_cores // 2)
+    # Look the build tools up before the threads start (lru_cache doesn't stop both from computing it)
+    cmake_tool_args()
+    print_info(f"Building AFF3CT and StreamPU at the same time ({half} cores each, --serial to disable)...")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # Only half of the available memory is AFF3CT's: the StreamPU build uses the rest
+        aff3ct_build = executor.submit(build_aff3ct, hulotte_root, half, 4)
+        streampu_build = executor.submit(build_streampu, hulotte_root, half, True)
+    return aff3ct_build.result(), streampu_build.result()
+
+
+def _sha256(path):
+    """Hex SHA-256 digest of a file"""
+    import hashlib
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def install_surfer(hulotte_root, cache_dir=None):
     """Download and install Surfer binary"""
+    # Only needed here (and zipfile pulls in the compression modules)
+    import zipfile
+
     print_header("Installing Surfer (Waveform Viewer)")
     
     # URL for Linux x86_64 binary (v0.3.0 Release)
@@ -350,28 +620,62 @@ def install_surfer(hulotte_root):
     zip_file = tools_dir / "surfer.zip"
     target_file = tools_dir / "surfer"
     
-    print_info(f"Downloading Surfer v0.3.0...")
+    # With a cache: the archive is kept for reinstalls, and the installed binary is
+    # fingerprinted so that a rerun can tell it is still intact
+    cached_zip = cache_dir / surfer_url.rsplit("/", 1)[-1] if cache_dir else None
+    stamp_file = cache_dir / "surfer.sha256" if cache_dir else None
+    if stamp_file and target_file.exists():
+        try:
+            if stamp_file.read_text() == f"{surfer_url} {_sha256(target_file)}":
+                print_success(f"Surfer v0.3.0 already installed at {to_relative_path(target_file)}")
+                return str(target_file)
+        except OSError:
+            pass
+    
     try:
-        # Try wget first
-        if shutil.which("wget"):
-            cmd = f"wget -O {zip_file} {surfer_url} -q --show-progress"
-            if not run_command(cmd, show_output=True):
-                print_error("Failed to download Surfer with wget")
-                return None
-        # Try curl
-        elif shutil.which("curl"):
-            cmd = f"curl -L -o {zip_file} {surfer_url}"
-            if not run_command(cmd, show_output=True):
-                print_error("Failed to download Surfer with curl")
-                return None
+        archive = None
+        if cached_zip and cached_zip.exists():
+            print_info("Using cached Surfer v0.3.0 archive...")
+            archive = cached_zip
         else:
-             print_error("Neither wget nor curl found. Cannot download Surfer.")
-             return None
+            print_info(f"Downloading Surfer v0.3.0...")
+            try:
+                # Download the archive into memory: no temporary zip file, no wget/curl process
+                import io
+                import http.client
+                import urllib.request
+                with urllib.request.urlopen(surfer_url, timeout=60) as response:
+                    data = response.read()
+                archive = io.BytesIO(data)
+            # A truncated transfer raises http.client.IncompleteRead, which is not an OSError
+            except (OSError, http.client.HTTPException) as e:
+                print_warning(f"Direct download failed ({e}), trying wget/curl...")
+                # Nothing partial is handed to the fallback (or cached)
+                data = archive = None
+                zip_file.unlink(missing_ok=True)
+
+        if archive is None:
+            # Try wget first
+            if shutil.which("wget"):
+                cmd = ["wget", "-O", str(zip_file), surfer_url, "-q", "--show-progress"]
+                if not run_command(cmd, show_output=True):
+                    print_error("Failed to download Surfer with wget")
+                    return None
+            # Try curl
+            elif shutil.which("curl"):
+                cmd = ["curl", "-L", "-o", str(zip_file), surfer_url]
+                if not run_command(cmd, show_output=True):
+                    print_error("Failed to download Surfer with curl")
+                    return None
+            else:
+                 print_error("Neither wget nor curl found. Cannot download Surfer.")
+                 return None
+            archive = zip_file
 
         # Extract zip
         print_info("Extracting Surfer...")
         try:
-            with zipfile.ZipFile(zip_file, 'r') as zf:
+            with zipfile.ZipFile(archive, 'r') as zf:
                 # Assuming the binary is named 'surfer' inside the zip
                 # List files to be sure
                 file_names = zf.namelist()
@@ -381,20 +685,31 @@ def install_surfer(hulotte_root):
                      print_error("Could not find surfer binary in zip archive")
                      return None
                 
-                # Extract to tools dir
-                zf.extract(surfer_bin_name, tools_dir)
-                
-                # If extracted file is not named 'surfer' (e.g. inside a folder), move it
-                extracted_path = tools_dir / surfer_bin_name
-                if extracted_path.resolve() != target_file.resolve():
-                    shutil.move(str(extracted_path), str(target_file))
+                # Write the binary straight to tools/surfer, wherever it sits in the archive
+                with zf.open(surfer_bin_name) as src, open(target_file, 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
 
         except zipfile.BadZipFile:
             print_error("Downloaded file is not a valid zip archive")
+            if archive is cached_zip or archive is zip_file:
+                archive.unlink()
             return None
 
         target_file.chmod(0o755) # Make executable
         
+        if cache_dir:
+            try:
+                cache_dir.mkdir(parents=True, exist_ok=True)
+                # Only an archive that extracted fine is worth caching
+                if archive is not cached_zip:
+                    if archive is zip_file:
+                        shutil.copyfile(zip_file, cached_zip)
+                    else:
+                        cached_zip.write_bytes(archive.getvalue())
+                stamp_file.write_text(f"{surfer_url} {_sha256(target_file)}")
+            except OSError:
+                pass
+        
         # Cleanup zip
         if zip_file.exists():
             zip_file.unlink()
@@ -413,36 +728,40 @@ def install_surfer(hulotte_root):
 
 def create_install_info(hulotte_root, aff3ct_info, streampu_info, surfer_path=None):
     """
-    Create a file with installation information
+    Create INSTALL_INFO.json (machine-readable) and INSTALL_INFO.txt (human summary)
     """
+    data = {
+        "aff3ct": aff3ct_info,
+        "streampu": streampu_info,
+        "surfer": str(surfer_path) if surfer_path else None,
+    }
+    json_file = hulotte_root / "INSTALL_INFO.json"
+    with open(json_file, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+    lines = ["Hulotte Dependencies Installation Information", "=" * 60, ""]
+    if aff3ct_info:
+        lines += ["AFF3CT Installation:",
+                  f"  Root: {aff3ct_info.get('aff3ct_root', 'N/A')}",
+                  f"  Library: {aff3ct_info.get('aff3ct_lib', 'N/A')}"]
+        if 'streampu_root' in aff3ct_info:
+            lines += [f"  StreamPU (submodule): {aff3ct_info['streampu_root']}",
+                      f"  StreamPU Library: {aff3ct_info.get('streampu_lib', 'N/A')}"]
+        lines.append("")
+    if streampu_info:
+        lines += ["StreamPU Standalone Installation:",
+                  f"  Root: {streampu_info.get('streampu_root', 'N/A')}",
+                  f"  Library: {streampu_info.get('streampu_lib', 'N/A')}",
+                  ""]
+    if data["surfer"]:
+        lines.append(f"Surfer (Waveform Viewer): {data['surfer']}")
+    lines += ["", "To create a new project, run:", "  python3 create_project.py", ""]
+
     info_file = hulotte_root / "INSTALL_INFO.txt"
+    info_file.write_text("\n".join(lines))
     
-    with open(info_file, 'w') as f:
-        f.write("Hulotte Dependencies Installation Information\n")
-        f.write("=" * 60 + "\n\n")
-        
-        if aff3ct_info:
-            f.write("AFF3CT Installation:\n")
-            f.write(f"  Root: {aff3ct_info.get('aff3ct_root', 'N/A')}\n")
-            f.write(f"  Library: {aff3ct_info.get('aff3ct_lib', 'N/A')}\n")
-            if 'streampu_root' in aff3ct_info:
-                f.write(f"  StreamPU (submodule): {aff3ct_info['streampu_root']}\n")
-                f.write(f"  StreamPU Library: {aff3ct_info.get('streampu_lib', 'N/A')}\n")
-            f.write("\n")
-        
-        if streampu_info:
-            f.write("StreamPU Standalone Installation:\n")
-            f.write(f"  Root: {streampu_info.get('streampu_root', 'N/A')}\n")
-            f.write(f"  Library: {streampu_info.get('streampu_lib', 'N/A')}\n")
-            f.write("\n")
-
-        if surfer_path:
-             f.write(f"Surfer (Waveform Viewer): {surfer_path}\n")
-        
-        f.write("\nTo create a new project, run:\n")
-        f.write("  python3 create_project.py\n")
-    
-    print_success(f"Installation info saved to: {info_file}")
+    print_success(f"Installation info saved to: {info_file} (and {json_file.name})")
 
 
 
@@ -459,7 +778,9 @@ def setup_python_environment(hulotte_root):
     if not venv_dir.exists():
         print_info(f"Creating virtual environment at: {to_relative_path(venv_dir)}")
         try:
-             subprocess.run([sys.executable, "-m", "venv", str(venv_dir)], check=True)
+             # pip is bootstrapped below, once (the venv module would reinstall it on every creation)
+             subprocess.run([sys.executable, "-m", "venv", "--without-pip", "--symlinks", str(venv_dir)],
+                            check=True)
         except subprocess.CalledProcessError:
              print_error("Failed to create virtual environment")
              return None
@@ -474,17 +795,32 @@ def setup_python_environment(hulotte_root):
     
     # Pip inside venv
     pip_cmd = venv_dir / "bin" / "pip"
+    uv = shutil.which("uv")
     
     try:
-        # Upgrade pip first
-        subprocess.run([str(pip_cmd), "install", "--upgrade", "pip"], 
-                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        
-        # Install packages
+        # Bootstrap pip once, the marker lets later runs skip ensurepip.
+        # Done even when uv installs the packages: users of the activated venv expect pip
+        pip_ready = venv_dir / ".pip_ready"
+        if not pip_ready.exists():
+            # --default-pip also installs the plain "pip" script, not only pip3/pip3.X
+            subprocess.run([str(venv_dir / "bin" / "python"), "-m", "ensurepip", "--upgrade", "--default-pip"],
+                           stdout=subprocess.DEVNULL, check=True)
+            pip_ready.touch()
+
         for package in packages:
             print_info(f"Installing {package}...")
-            subprocess.run([str(pip_cmd), "install", package], check=True)
-            
+
+        if uv:
+            # uv resolves and installs much faster than pip
+            subprocess.run([uv, "pip", "install", "--python", str(venv_dir / "bin" / "python"), *packages],
+                           check=True)
+        else:
+            # An outdated pip still works: failing to upgrade it (offline, proxy) is not fatal
+            subprocess.run([str(pip_cmd), "install", "--upgrade", "pip"],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            # Packages that are already installed are left as they are
+            subprocess.run([str(pip_cmd), "install", "--prefer-binary", "--no-compile", *packages], check=True)
+
         print_success("Python dependencies installed successfully")
         return venv_dir
         
@@ -493,25 +829,23 @@ def setup_python_environment(hulotte_root):
         return None
 
 
-def main(hoot=False):
+def main(hoot=False, use_cache=True, full_clone=False, force_reinstall=False,
+         surfer=True, streampu_standalone=True, serial_builds=False):
     """Main installation script"""
     print_ascii_art()
     if hoot:
-        play_owl_hoot()
+        play_owl_hoot_in_background()
     print_header("Hulotte Dependencies Installer")
     
     # Get Hulotte root
     # Use the directory where this script is located, not necessarily CWD
     hulotte_root = Path(__file__).resolve().parent
     print_info(f"Hulotte root: {to_relative_path(hulotte_root)}")
+    cache_dir = hulotte_root / ".cache" if use_cache else None
     
     # Check prerequisites
     print_header("Checking Prerequisites")
-    if not check_git():
-        return 1
-    if not check_cmake():
-        return 1
-    if not check_compiler():
+    if not check_prerequisites():
         return 1
     
     print_success("All prerequisites satisfied")
@@ -523,22 +857,12 @@ def main(hoot=False):
         if not ask_yes_no("Continue anyway?", default=False):
             return 1
     
-    # Ask about AFF3CT installation
-    aff3ct_info = None
-    if ask_yes_no("\nDo you want to install AFF3CT (with StreamPU)?", default=True):
-        aff3ct_info = install_aff3ct(hulotte_root)
-        if aff3ct_info is None:
-            print_error("AFF3CT installation failed")
-            if not ask_yes_no("Continue anyway?", default=False):
-                return 1
-    
-    # Ask about standalone StreamPU installation
-    streampu_info = None
-    install_standalone = False
-    
-    # If AFF3CT was installed with StreamPU, ask if they still want standalone
-    if aff3ct_info and 'streampu_root' in aff3ct_info:
-        print_info("\nStreamPU was already installed as part of AFF3CT")
+    # Ask what to install up front, so that both clones can run at once
+    install_aff3ct_lib = ask_yes_no("\nDo you want to install AFF3CT (with StreamPU)?", default=True)
+    if not streampu_standalone:
+        install_standalone = False
+    elif install_aff3ct_lib:
+        print_info("\nStreamPU is compiled as part of AFF3CT")
         install_standalone = ask_yes_no(
             "Do you still want to install StreamPU standalone?",
             default=False
@@ -549,15 +873,28 @@ def main(hoot=False):
             default=True
         )
     
-    if install_standalone:
-        streampu_info = install_streampu(hulotte_root)
-        if streampu_info is None:
-            print_error("StreamPU installation failed")
+    aff3ct_info = None
+    streampu_info = None
+    if install_aff3ct_lib and install_standalone:
+        aff3ct_info, streampu_info = install_aff3ct_and_streampu(hulotte_root, cache_dir, full_clone, force_reinstall,
+                                                                 serial_builds)
+    elif install_aff3ct_lib:
+        aff3ct_info = install_aff3ct(hulotte_root, cache_dir, full_clone, force_reinstall)
+    elif install_standalone:
+        streampu_info = install_streampu(hulotte_root, cache_dir, full_clone, force_reinstall)
+    
+    if install_aff3ct_lib and aff3ct_info is None:
+        print_error("AFF3CT installation failed")
+        if not ask_yes_no("Continue anyway?", default=False):
+            return 1
+    
+    if install_standalone and streampu_info is None:
+        print_error("StreamPU installation failed")
 
     # Ask about Surfer installation
     surfer_path = None
-    if ask_yes_no("\nDo you want to install Surfer (Waveform Viewer)?", default=True):
-        surfer_path = install_surfer(hulotte_root)
+    if surfer and ask_yes_no("\nDo you want to install Surfer (Waveform Viewer)?", default=True):
+        surfer_path = install_surfer(hulotte_root, cache_dir)
     
     # Create installation info file
     if aff3ct_info or streampu_info or surfer_path:
@@ -595,10 +932,33 @@ def main(hoot=False):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Install Hulotte dependencies")
     parser.add_argument("--hoot", action="store_true", help="Enable startup sound")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore .cache/ (cached latest tags, Surfer archive)")
+    parser.add_argument("--full-clone", action="store_true",
+                        help="Clone AFF3CT/StreamPU with their full history (default: shallow clone of the tag)")
+    parser.add_argument("--force-reinstall", action="store_true",
+                        help="Rebuild AFF3CT/StreamPU even if a previous build is found")
+    parser.add_argument("--serial", action="store_true",
+                        help="Build AFF3CT and StreamPU one after the other instead of at the same time")
+    parser.add_argument("-y", "--yes", action="store_true",
+                        help="Do not ask questions, take the default answer to each of them")
+    parser.add_argument("--aff3ct-tag", help="AFF3CT tag/branch to install (default: latest tag)")
+    parser.add_argument("--streampu-tag", help="StreamPU tag/branch to install (default: latest tag)")
+    parser.add_argument("--no-surfer", action="store_true", help="Do not install Surfer")
+    parser.add_argument("--no-streampu-standalone", action="store_true",
+                        help="Do not install StreamPU standalone")
     args = parser.parse_args()
 
+    ASSUME_YES = args.yes
+    if args.aff3ct_tag:
+        PINNED_TAGS["AFF3CT"] = args.aff3ct_tag
+    if args.streampu_tag:
+        PINNED_TAGS["StreamPU"] = args.streampu_tag
+
     try:
-        sys.exit(main(hoot=args.hoot))
+        sys.exit(main(hoot=args.hoot, use_cache=not args.no_cache, full_clone=args.full_clone,
+                      force_reinstall=args.force_reinstall, surfer=not args.no_surfer,
+                      streampu_standalone=not args.no_streampu_standalone, serial_builds=args.serial))
     except KeyboardInterrupt:
         print("\n\nInstallation cancelled by user")
         sys.exit(1)